@@ -4,14 +4,16 @@ import logging
 import json
 import re
 import math
+import time
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, Any
 import asyncio
 import uuid
 import functools
+from types import MappingProxyType
 
 from homeassistant.components import mqtt as ha_mqtt
-from homeassistant.core import CoreState
+from homeassistant.core import CoreState, callback
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
@@ -20,7 +22,7 @@ from homeassistant.const import UnitOfPower, UnitOfEnergy, EVENT_HOMEASSISTANT_S
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.restore_state import RestoreEntity
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_track_time_interval, async_track_state_change_event
 from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from homeassistant.helpers import entity_registry as er
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
@@ -48,6 +50,10 @@ DEFAULT_EM1DATA_KEYS = [
     "max_voltage", "min_voltage", "avg_voltage",
     "max_current", "min_current", "avg_current",
 ]
+_EM1_PUBLISH_LAYOUT = tuple((k, i) for i, k in enumerate(DEFAULT_EM1DATA_KEYS))
+
+# Attributs de debug exposés uniquement quand le logger est en DEBUG
+_EMPTY_ATTRS = MappingProxyType({})
 
 REST_TO_SNAKE = {
     "solarPower": "solar_power",
@@ -78,6 +84,17 @@ def _serial_for_topic(s: Optional[str]) -> str:
 def _norm_serial(s: Optional[str]) -> str:
     return _serial_for_uid(s)
 
+# Parties fixes des device_info, partagées par toutes les entités
+_BATTERY_DEVICE_BASE = MappingProxyType({"manufacturer": "Beem Energy", "model": "Beem Battery"})
+_SOLAR_DEVICE_BASE = MappingProxyType({"manufacturer": "Beem Energy", "model": "MPPT / Solar Equipment"})
+_BEEMBOX_DEVICE_BASE = MappingProxyType({"manufacturer": "Beem Energy", "model": "BeemOn / PnP"})
+_ES_DEVICE_BASE = MappingProxyType({"manufacturer": "Beem Energy", "model": "EnergySwitch"})
+
+def _battery_device_info(serial: str) -> Dict[str, Any]:
+    serial = str(serial).strip()
+    return {**_BATTERY_DEVICE_BASE, "identifiers": {(DOMAIN, serial)}, "name": f"Batterie Beem {serial}"}
+
+@functools.lru_cache(maxsize=1024)
 def _clean_key(serial, key):
     key = str(key).lower()
     serial = str(serial)
@@ -114,6 +131,15 @@ def _to_float(x):
         # On ne capture que les erreurs de conversion attendues
         return None
 
+def _power_from_state(state) -> Optional[float]:
+    """Puissance absolue (W) d'un State HA, None si indisponible ou non numérique."""
+    if state is None or state.state in (None, "unknown", "unavailable"):
+        return None
+    try:
+        return abs(float(state.state))
+    except (ValueError, TypeError):
+        return None
+
 def _parse_payload_dt(value):
     if value is None:
         return None, False
@@ -136,18 +162,22 @@ class MqttBatteryBuffer:
     def __init__(self, availability_window: int = 120):
         self._data: Dict[str, tuple[Any, datetime]] = {}
         self._availability_window = int(availability_window)
+        # Incrémenté à chaque écriture : permet aux lecteurs d'invalider leurs caches
+        self.version = 0
+        self._latest_ts: datetime | None = None
 
     def update(self, key, value):
-        self._data[str(key)] = (value, datetime.now(timezone.utc))
+        ts = datetime.now(timezone.utc)
+        self._data[str(key)] = (value, ts)
+        self.version += 1
+        if self._latest_ts is None or ts > self._latest_ts:
+            self._latest_ts = ts
 
     def get(self, key):
         return self._data.get(str(key), (None, None))
 
     def last_ts(self):
-        if not self._data:
-            return None
-        ts_vals = [ts for _, ts in self._data.values() if ts]
-        return max(ts_vals) if ts_vals else None
+        return self._latest_ts
 
     def is_fresh(self, now: datetime | None = None) -> bool:
         ts = self.last_ts()
@@ -437,6 +467,19 @@ async def async_setup_entry(
             _echo_seen_set.discard(old)
         return False
 
+    # Regroupe les rafales MQTT : au plus un envoi dispatcher par signal et par tour de boucle
+    _pending_dispatch: set[str] = set()
+    def _flush_dispatch(signal: str):
+        _pending_dispatch.discard(signal)
+        async_dispatcher_send(hass, signal)
+    def _schedule_dispatch(signal: str):
+        if signal not in _pending_dispatch:
+            _pending_dispatch.add(signal)
+            hass.loop.call_soon(_flush_dispatch, signal)
+
+    # Dicts de métriques réutilisés par (es_serial, canal) pour les NotifyEvent EM1Data
+    _metrics_pool: Dict[tuple[str, int], Dict[str, Any]] = {}
+
     def _es_put(es_serial: str, chan: int, key: str, value: Any):
         try:
             canon = _ES_ALIAS_MAP.get(str(key).lower().replace("-", "_").replace(" ", "_").strip("_"), key)
@@ -454,7 +497,7 @@ async def async_setup_entry(
         for k, v in (metrics or {}).items():
             if k in map_inst: _es_put(es_serial, chan, map_inst[k], v)
             elif k in map_cum: _es_put(es_serial, chan, map_cum[k], v)
-        async_dispatcher_send(hass, f"{SIGNAL_BEEM_ES_UPDATE}_{es_serial}")
+        _schedule_dispatch(f"{SIGNAL_BEEM_ES_UPDATE}_{es_serial}")
 
     def _process_notifystatus(es_serial: str, chan: int, data: Dict[str, Any]):
         if not isinstance(data, dict): return
@@ -529,7 +572,7 @@ async def async_setup_entry(
                 else: handled = _maybe_push_instant(comp_key, value) or handled
         ts = (payload.get("ts") or payload.get("unixtime") or payload.get("params", {}).get("ts") or (isinstance(result, dict) and result.get("ts")))
         if ts: _get_es_buf(es_serial).update("__last_dt__", str(ts))
-        if handled: async_dispatcher_send(hass, f"{SIGNAL_BEEM_ES_UPDATE}_{es_serial}")
+        if handled: _schedule_dispatch(f"{SIGNAL_BEEM_ES_UPDATE}_{es_serial}")
     def _handle_events_rpc(es_serial: str, topic: str, msg: dict):
         if not isinstance(msg, dict): return
         if "result" in msg: _handle_result_payload(es_serial, msg); return
@@ -561,13 +604,19 @@ async def async_setup_entry(
                     except Exception: continue
                     data = (ev or {}).get("data", {})
                     if isinstance(data, dict) and "values" in data:
-                        keys = DEFAULT_EM1DATA_KEYS
                         vals = data.get("values") or []
                         if isinstance(vals, list) and vals:
                             last = vals[-1] if isinstance(vals[-1], list) else None
                             if isinstance(last, list):
-                                flat = {k: last[i] for i, k in enumerate(keys) if i < len(last)}
-                                _publish_metrics(es_serial, chan, {"total_act_energy": flat.get("total_act_energy"), "total_act_ret_energy": flat.get("total_act_ret_energy"), "lag_react_energy": flat.get("lag_react_energy"), "lead_react_energy": flat.get("lead_react_energy"), "max_act_power": flat.get("max_act_power"), "min_act_power": flat.get("min_act_power"), "max_aprt_power": flat.get("max_aprt_power"), "min_aprt_power": flat.get("min_aprt_power"), "max_voltage": flat.get("max_voltage"), "min_voltage": flat.get("min_voltage"), "avg_voltage": flat.get("avg_voltage"), "max_current": flat.get("max_current"), "min_current": flat.get("min_current"), "avg_current": flat.get("avg_current")})
+                                # _publish_metrics ne conserve pas le dict : on le réutilise
+                                key = (es_serial, chan)
+                                metrics = _metrics_pool.get(key)
+                                if metrics is None: metrics = _metrics_pool[key] = {}
+                                # Ligne courte : les métriques absentes sont publiées à None
+                                n = len(last)
+                                for name, i in _EM1_PUBLISH_LAYOUT:
+                                    metrics[name] = last[i] if i < n else None
+                                _publish_metrics(es_serial, chan, metrics)
             return
 
 
@@ -599,7 +648,7 @@ async def async_setup_entry(
                         alias = camel_map.get(k)
                         if alias: mbuf.update(alias, v)
         _LOGGER.info("[MQTT][battery] topic=%s serial=%s -> buffered keys=%s", topic, serial, list(mbuf._data.keys()))
-        async_dispatcher_send(hass, f"{SIGNAL_BEEM_BATTERY_UPDATE}_{serial}")
+        _schedule_dispatch(f"{SIGNAL_BEEM_BATTERY_UPDATE}_{serial}")
 
 
     def _make_es_cb(es_serial_uid: str):
@@ -669,11 +718,12 @@ async def async_setup_entry(
                         await mqtt_client.subscribe(t)
                         _LOGGER.info("✅ Abonné Cloud : %s", t)
                     async for message in mqtt_client.messages:
-                        # --- CORRECTION APPLIQUÉE ICI ---
-                        # 1. On convertit le topic en chaîne de caractères
-                        topic_str = str(message.topic)
-                        # 2. On travaille ensuite avec cette chaîne
-                        serial_uid = _serial_for_uid(topic_str.split('/')[1])
+                        topic = message.topic
+                        topic_str = topic if isinstance(topic, str) else str(topic)
+                        # "battery/{serial}/sys/streaming" → segment entre les deux premiers '/'
+                        first = topic_str.find("/")
+                        second = topic_str.find("/", first + 1)
+                        serial_uid = _serial_for_uid(topic_str[first + 1:second] if second != -1 else topic_str[first + 1:])
                         payload = _decode_payload_bytes(message.payload)
                         _ingest_battery_payload(serial_uid, topic_str, payload)
 
@@ -685,6 +735,14 @@ async def async_setup_entry(
             if entry.entry_id not in hass.data.get(DOMAIN, {}): break
             await asyncio.sleep(15)
 
+    # Méthode de relance du streaming résolue une seule fois (coordinateur fixe pour l'entrée)
+    _ensure_streaming = None
+    if coordinator:
+        for attr in ("async_ensure_streaming", "async_keep_streaming", "ensure_streaming"):
+            if hasattr(coordinator, attr) and callable(getattr(coordinator, attr)):
+                _ensure_streaming = (attr, getattr(coordinator, attr))
+                break
+
     async def _tick_availability(_now=None, entry=None):
         if not entry or not hass.data.get(DOMAIN, {}).get(entry.entry_id): return
         for serial in list(mqtt_buffers.keys()): async_dispatcher_send(hass, f"{SIGNAL_BEEM_BATTERY_UPDATE}_{serial}")
@@ -692,21 +750,18 @@ async def async_setup_entry(
         try:
             if not coordinator: return
             for serial, buf in list(mqtt_buffers.items()):
-                if not buf.is_fresh():
-                    for attr in ("async_ensure_streaming", "async_keep_streaming", "ensure_streaming"):
-                        fn = getattr(coordinator, attr, None)
-                        if callable(fn):
-                            try:
-                                res = fn(serial)
-                                if asyncio.iscoroutine(res): await res
-                                break
-                            except Exception as e:
-                                _LOGGER.debug(
-                                    "La tentative de relance du streaming via '%s' pour le serial %s a échoué : %s",
-                                    attr,
-                                    serial,
-                                    e
-                                )
+                if not buf.is_fresh() and _ensure_streaming is not None:
+                    attr, fn = _ensure_streaming
+                    try:
+                        res = fn(serial)
+                        if asyncio.iscoroutine(res): await res
+                    except Exception as e:
+                        _LOGGER.debug(
+                            "La tentative de relance du streaming via '%s' pour le serial %s a échoué : %s",
+                            attr,
+                            serial,
+                            e
+                        )
             stale_store = hass.data[DOMAIN][entry.entry_id].setdefault("stale_counts", {})
             for serial, buf in list(mqtt_buffers.items()):
                 fresh = buf.is_fresh()
@@ -813,6 +868,13 @@ async def async_setup_entry(
     return True
 
 class BeemMqttOrRestSensor(SensorEntity):
+    # SensorEntity garde son __dict__ (attributs _attr_* de HA) ; les slots couvrent nos attributs propres
+    __slots__ = (
+        "_serial", "_logical_key", "_unit", "_icon", "_mqtt_buffer", "_rest_battery",
+        "_prefer_mqtt", "_debug_last_mqtt_key", "_debug_source", "_debug_rest_key",
+        "_buffer_data_ref", "_unsub_dispatcher", "_unsub_timer",
+    )
+
     def __init__(self, serial, logical_key, unit, icon, mqtt_buffer, rest_battery, prefer_mqtt=True):
         self._serial = _serial_for_uid(serial)
         self._logical_key = logical_key
@@ -824,6 +886,7 @@ class BeemMqttOrRestSensor(SensorEntity):
         self._debug_last_mqtt_key = "INIT"
         self._debug_source = "init"
         self._debug_rest_key = None
+        self._buffer_data_ref = getattr(mqtt_buffer, "_data", None) if mqtt_buffer else None
 
         _ckey = _clean_key(self._serial, logical_key)
         self._attr_unique_id = f"beem_{self._serial}_{_ckey}"
@@ -909,12 +972,9 @@ class BeemMqttOrRestSensor(SensorEntity):
 
     @property
     def extra_state_attributes(self):
-        keys = []
-        try:
-            if getattr(self._mqtt_buffer, "_data", None):
-                keys = list(self._mqtt_buffer._data.keys())
-        except Exception as e:
-            _LOGGER.debug("Erreur lors de la récupération des clés du buffer pour %s: %s", self._attr_unique_id, e)
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            return _EMPTY_ATTRS
+        keys = list(self._buffer_data_ref) if self._buffer_data_ref is not None else []
         return {
             "prefer_mqtt": bool(self._prefer_mqtt),
             "debug_source": self._debug_source,
@@ -923,17 +983,16 @@ class BeemMqttOrRestSensor(SensorEntity):
             "buffer_keys": keys,
         }
 
-    @property
+    @functools.cached_property
     def device_info(self):
-        serial = str(self._serial).strip()
-        return {
-            "identifiers": {(DOMAIN, serial)},
-            "name": f"Batterie Beem {serial}",
-            "manufacturer": "Beem Energy",
-            "model": "Beem Battery",
-        }
+        return _battery_device_info(self._serial)
 
 class BeemDerivedSensor(SensorEntity):
+    __slots__ = (
+        "_serial", "_source_key", "_mode", "_mqtt_buffer", "_rest_battery",
+        "_debug_last_mqtt_key", "_buffer_data_ref", "_unsub_dispatcher", "_unsub_timer",
+    )
+
     def __init__(self, serial, source_key, mode, mqtt_buffer, rest_battery):
         self._serial = _serial_for_uid(serial)
         self._source_key = source_key
@@ -941,6 +1000,7 @@ class BeemDerivedSensor(SensorEntity):
         self._mqtt_buffer = mqtt_buffer
         self._rest_battery = rest_battery
         self._debug_last_mqtt_key = "INIT"
+        self._buffer_data_ref = getattr(mqtt_buffer, "_data", None) if mqtt_buffer else None
 
         _ckey = _clean_key(self._serial, f"{source_key}_{mode}")
         self._attr_unique_id = f"beem_{self._serial}_{_ckey}"
@@ -1018,29 +1078,25 @@ class BeemDerivedSensor(SensorEntity):
 
     @property
     def extra_state_attributes(self):
-        keys = []
-        try:
-            if getattr(self._mqtt_buffer, "_data", None):
-                keys = list(self._mqtt_buffer._data.keys())
-        except Exception as e:
-            _LOGGER.debug("Erreur lors de la récupération des clés du buffer pour %s: %s", self._attr_unique_id, e)
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            return _EMPTY_ATTRS
+        keys = list(self._buffer_data_ref) if self._buffer_data_ref is not None else []
         return {
             "prefer_mqtt": True,
             "debug_mqtt_key": self._debug_last_mqtt_key,
             "buffer_keys": keys,
         }
 
-    @property
+    @functools.cached_property
     def device_info(self):
-        serial = str(self._serial).strip()
-        return {
-            "identifiers": {(DOMAIN, serial)},
-            "name": f"Batterie Beem {serial}",
-            "manufacturer": "Beem Energy",
-            "model": "Beem Battery",
-        }
+        return _battery_device_info(self._serial)
 
 class BeemEnergySensor(SensorEntity, RestoreEntity):
+    __slots__ = (
+        "_serial", "_source_key", "_mode", "_last_updated", "_integrated_value",
+        "_unsub_timer", "_unsub_source", "_last_power", "_last_written", "_power_entity_id", "_derived_uid", "_reg",
+    )
+
     def __init__(self, hass, serial, source_key, mode):
         self.hass = hass
         self._serial = _serial_for_uid(serial)
@@ -1060,71 +1116,103 @@ class BeemEnergySensor(SensorEntity, RestoreEntity):
         self._last_updated = None
         self._integrated_value = 0.0
         self._unsub_timer = None
+        self._unsub_source = None
+        self._last_power = None
+        self._last_written = None
         self._power_entity_id = None
+        # unique_id du capteur de puissance dérivé à intégrer
+        self._derived_uid = f"beem_{self._serial}_{_clean_key(self._serial, f'{source_key}_{mode}')}"
+        self._reg = None
 
     async def async_added_to_hass(self):
-        self._last_updated = datetime.now(timezone.utc)
-        reg = er.async_get(self.hass)
-        derived_uid = f"beem_{self._serial}_{_clean_key(self._serial, f'{self._source_key}_{self._mode}')}"
-        power_entity = reg.async_get_entity_id("sensor", DOMAIN, derived_uid)
-        if power_entity:
-            self._power_entity_id = power_entity
-        else:
-            _LOGGER.debug("[BeemEnergySensor] Unresolved power entity for unique_id=%s", derived_uid)
+        self._last_updated = time.monotonic()
+        self._reg = er.async_get(self.hass)
 
         last_state = await self.async_get_last_state()
         if last_state and last_state.state not in (None, "unknown", "unavailable"):
             try:
                 self._integrated_value = float(last_state.state)
-            except Exception:
+            except (ValueError, TypeError):
                 self._integrated_value = 0.0
 
-        self._unsub_timer = async_track_time_interval(self.hass, self._handle_update, timedelta(seconds=60))
+        if not self._resolve_power_entity():
+            _LOGGER.debug("[BeemEnergySensor] Unresolved power entity for unique_id=%s", self._derived_uid)
+
+        # Intégration pilotée par les changements d'état de la source ;
+        # timer lent de sécurité si la source cesse de publier.
+        self._unsub_timer = async_track_time_interval(self.hass, self._handle_update, timedelta(minutes=5))
 
     async def async_will_remove_from_hass(self):
         if self._unsub_timer:
             self._unsub_timer()
             self._unsub_timer = None
+        if self._unsub_source:
+            self._unsub_source()
+            self._unsub_source = None
 
-    async def _handle_update(self, now):
+    def _resolve_power_entity(self) -> bool:
+        if self._power_entity_id:
+            return True
+        self._power_entity_id = self._reg.async_get_entity_id("sensor", DOMAIN, self._derived_uid)
         if not self._power_entity_id:
-            reg = er.async_get(self.hass)
-            derived_uid = f"beem_{self._serial}_{_clean_key(self._serial, f'{self._source_key}_{self._mode}')}"
-            self._power_entity_id = reg.async_get_entity_id("sensor", DOMAIN, derived_uid)
-            if not self._power_entity_id:
-                return
-
-        state = self.hass.states.get(self._power_entity_id)
-        if state is None or state.state in (None, "unknown", "unavailable"):
+            return False
+        self._last_power = _power_from_state(self.hass.states.get(self._power_entity_id))
+        # Le premier intervalle part de la résolution : rien n'est rétro-appliqué
+        self._last_updated = time.monotonic() if self._last_power is not None else None
+        self._unsub_source = async_track_state_change_event(
+            self.hass, [self._power_entity_id], self._on_source_change
+        )
+        return True
+
+    @callback
+    def _on_source_change(self, event):
+        power_watts = _power_from_state(event.data.get("new_state"))
+        if power_watts is None:
+            # Source inconnue/indisponible : on coupe l'intégration (le tick de sécurité
+            # ne doit pas prolonger la dernière puissance) et on repart de zéro au retour
+            self._last_power = None
+            self._last_updated = None
             return
-        try:
-            power_watts = abs(float(state.state))
-        except (ValueError, TypeError):
+        self._integrate(power_watts)
+
+    async def _handle_update(self, now):
+        if not self._resolve_power_entity():
+            return
+        # Dernière puissance connue, tenue à jour par _on_source_change
+        if self._last_power is None:
             return
+        self._integrate(self._last_power)
 
-        now_dt = datetime.now(timezone.utc)
+    def _integrate(self, power_watts: float):
+        """Intégration rectangle à gauche : la source est une valeur tenue jusqu'au changement suivant."""
+        now_m = time.monotonic()
+        delta = 0.0
         if self._last_updated is not None:
-            elapsed = (now_dt - self._last_updated).total_seconds()
+            elapsed = now_m - self._last_updated
             if elapsed > 0:
-                self._integrated_value += (power_watts * (elapsed / 3600.0)) / 1000.0
-        self._last_updated = now_dt
+                prev = self._last_power if self._last_power is not None else power_watts
+                delta = prev * elapsed / 3_600_000
+        self._last_updated = now_m
+        self._last_power = power_watts
+        self._integrated_value += delta
+        # N'écrit l'état que si la valeur publiée (arrondie) change
+        rounded = round(self._integrated_value, 3)
+        if rounded == self._last_written:
+            return
+        self._last_written = rounded
         self.async_write_ha_state()
 
     @property
     def native_value(self):
         return round(self._integrated_value, 3)
 
-    @property
+    @functools.cached_property
     def device_info(self):
-        serial = str(self._serial).strip()
-        return {
-            "identifiers": {(DOMAIN, serial)},
-            "name": f"Batterie Beem {serial}",
-            "manufacturer": "Beem Energy",
-            "model": "Beem Battery",
-        }
+        return _battery_device_info(self._serial)
 
 class BeemMqttLastUpdateSensor(SensorEntity):
+    __slots__ = ("_serial", "_mqtt_buffer")
+
     def __init__(self, serial, mqtt_buffer):
         self._serial = _serial_for_uid(serial)
         self._mqtt_buffer = mqtt_buffer
@@ -1143,21 +1231,17 @@ class BeemMqttLastUpdateSensor(SensorEntity):
             dt, ok = _parse_payload_dt(last_payload_dt_str)
             if ok:
                 return dt.isoformat(timespec="seconds")
-        last_ts = max(ts for val, ts in self._mqtt_buffer._data.values() if ts)
-        return last_ts.isoformat()
+        last_ts = self._mqtt_buffer.last_ts()
+        return last_ts.isoformat() if last_ts else None
 
-    @property
+    @functools.cached_property
     def device_info(self):
-        serial = str(self._serial).strip()
-        return {
-            "identifiers": {(DOMAIN, serial)},
-            "name": f"Batterie Beem {serial}",
-            "manufacturer": "Beem Energy",
-            "model": "Beem Battery",
-        }
+        return _battery_device_info(self._serial)
 
 class BeemMqttDebugSensor(SensorEntity):
     """Expose tout le contenu du buffer MQTT d'une batterie."""
+    __slots__ = ("_serial", "_mqtt_buffer", "_attrs_cache", "_attrs_version")
+
     def __init__(self, serial, mqtt_buffer):
         self._serial = _serial_for_uid(serial)
         self._mqtt_buffer = mqtt_buffer
@@ -1166,41 +1250,44 @@ class BeemMqttDebugSensor(SensorEntity):
         self._attr_icon = "mdi:bug"
         self._attr_entity_category = EntityCategory.DIAGNOSTIC
         self._attr_has_entity_name = True
+        self._attrs_cache = None
+        self._attrs_version = -1
 
     @property
     def native_value(self):
-        try:
-            return len(getattr(self._mqtt_buffer, "_data", {}) or {})
-        except Exception:
-            return 0
+        data = getattr(self._mqtt_buffer, "_data", None)
+        return len(data) if data else 0
 
     @property
     def extra_state_attributes(self):
+        version = getattr(self._mqtt_buffer, "version", None)
+        if version is not None and version == self._attrs_version:
+            return self._attrs_cache
         attrs = {}
         try:
-            for k, (val, ts) in (getattr(self._mqtt_buffer, "_data", {}) or {}).items():
-                safe_key = f"buf__{k}"
-                attrs[safe_key] = val
-                if isinstance(ts, datetime):
-                    attrs[f"{safe_key}__ts"] = ts.isoformat()
-        except Exception as e:
+            items = (getattr(self._mqtt_buffer, "_data", {}) or {}).items()
+            attrs = {f"buf__{k}": val for k, (val, _) in items}
+            attrs.update({f"buf__{k}__ts": ts.isoformat() for k, (_, ts) in items if isinstance(ts, datetime)})
+        except (AttributeError, TypeError, ValueError) as e:
                     _LOGGER.debug(
                         "Erreur lors de la construction des attributs pour le capteur de débogage %s: %s",
                         self._attr_unique_id, e
                     )
+        if version is not None:
+            self._attrs_cache = attrs
+            self._attrs_version = version
         return attrs
 
-    @property
+    @functools.cached_property
     def device_info(self):
-        serial = str(self._serial).strip()
-        return {
-            "identifiers": {(DOMAIN, serial)},
-            "name": f"Batterie Beem {serial}",
-            "manufacturer": "Beem Energy",
-            "model": "Beem Battery",
-        }
+        return _battery_device_info(self._serial)
 
 class SolarEquipmentSensor(SensorEntity):
+    __slots__ = (
+        "coordinator", "_equipment_id", "_sensor_key", "_equipment_index",
+        "_main_battery_serial", "_via_device",
+    )
+
     def __init__(self, coordinator, equipment_id, sensor_key, unit, equipment_index, icon, main_battery_serial):
         self.coordinator = coordinator
         self._equipment_id = str(equipment_id)
@@ -1216,113 +1303,107 @@ class SolarEquipmentSensor(SensorEntity):
 
     @property
     def native_value(self):
-        try:
-            equipment = None
-            if hasattr(self.coordinator, "data"):
-                equipments = self.coordinator.data.get("battery", {}).get("solarEquipments", [])
-                if len(equipments) > self._equipment_index:
-                    equipment = equipments[self._equipment_index]
-            if equipment is None:
-                return None
-            return equipment.get(self._sensor_key)
-        except Exception:
+        data = getattr(self.coordinator, "data", None)
+        if not isinstance(data, dict):
+            return None
+        equipments = (data.get("battery") or {}).get("solarEquipments") or []
+        if len(equipments) <= self._equipment_index:
             return None
+        equipment = equipments[self._equipment_index]
+        return equipment.get(self._sensor_key) if isinstance(equipment, dict) else None
 
-    @property
+    @functools.cached_property
     def device_info(self):
         return {
+            **_SOLAR_DEVICE_BASE,
             "identifiers": {(DOMAIN, f"solar_{self._main_battery_serial}_{self._equipment_id}")},
             "name": f"Beem Solar Equipment {self._main_battery_serial} - {self._equipment_id}",
-            "manufacturer": "Beem Energy",
-            "model": "MPPT / Solar Equipment",
             "via_device": self._via_device,
         }
 
 class BeemBoxSensor(SensorEntity):
     """Représente un capteur pour une BeemBox."""
-    
-    SENSOR_TYPES = {
-        "power": {
-            "key": "wattHour",
-            "name": "Puissance",
-            "unit": UnitOfPower.WATT,
-            "icon": "mdi:solar-power",
-            "device_class": SensorDeviceClass.POWER,
-            "state_class": SensorStateClass.MEASUREMENT,
-        },
-        "today": {
-            "key": "totalDay",
-            "name": "Production Aujourd'hui",
-            "unit": UnitOfEnergy.WATT_HOUR,
-            "icon": "mdi:counter",
-            "device_class": SensorDeviceClass.ENERGY,
-            "state_class": SensorStateClass.TOTAL_INCREASING,
-        },
-        "month": {
-            "key": "totalMonth",
-            "name": "Production du Mois",
-            "unit": UnitOfEnergy.WATT_HOUR,
-            "icon": "mdi:calendar-month",
-            "device_class": SensorDeviceClass.ENERGY,
-            "state_class": SensorStateClass.TOTAL_INCREASING,
-        },
-        "wifi": {
-            "key": "lastDbm",
-            "name": "Signal WiFi",
-            "unit": "dBm",
-            "icon": "mdi:wifi",
-            "device_class": "signal_strength",
-            "state_class": SensorStateClass.MEASUREMENT,
-            "entity_category": EntityCategory.DIAGNOSTIC,
-        },
-        "last_production": {
-            "key": "lastProduction",
-            "name": "Dernière Production",
-            "unit": None,
-            "icon": "mdi:clock-outline",
-            "device_class": "timestamp",
-            "entity_category": EntityCategory.DIAGNOSTIC,
-        },
-    }
+    __slots__ = (
+        "coordinator", "_box_id", "_sensor_type", "_key", "_is_timestamp", "_device_info_base", "_summary_ref",
+    )
+
+    # sensor_type -> (key, name, unit, icon, device_class, state_class, entity_category)
+    SENSOR_TYPES = MappingProxyType({
+        "power": (
+            "wattHour", "Puissance", UnitOfPower.WATT, "mdi:solar-power",
+            SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT, None,
+        ),
+        "today": (
+            "totalDay", "Production Aujourd'hui", UnitOfEnergy.WATT_HOUR, "mdi:counter",
+            SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING, None,
+        ),
+        "month": (
+            "totalMonth", "Production du Mois", UnitOfEnergy.WATT_HOUR, "mdi:calendar-month",
+            SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING, None,
+        ),
+        "wifi": (
+            "lastDbm", "Signal WiFi", "dBm", "mdi:wifi",
+            "signal_strength", SensorStateClass.MEASUREMENT, EntityCategory.DIAGNOSTIC,
+        ),
+        "last_production": (
+            "lastProduction", "Dernière Production", None, "mdi:clock-outline",
+            "timestamp", None, EntityCategory.DIAGNOSTIC,
+        ),
+    })
 
     def __init__(self, coordinator, box_id, sensor_type):
         self.coordinator = coordinator
         self._box_id = str(box_id)
         self._sensor_type = sensor_type
-        
-        meta = self.SENSOR_TYPES[sensor_type]
-        self._key = meta["key"]
+
+        key, name, unit, icon, device_class, state_class, entity_category = self.SENSOR_TYPES[sensor_type]
+        self._key = key
+        self._is_timestamp = device_class == "timestamp"
 
         self._attr_unique_id = f"beembox_{self._box_id}_{sensor_type}".lower()
-        self._attr_name = meta["name"]
-        self._attr_native_unit_of_measurement = meta.get("unit")
-        self._attr_icon = meta.get("icon")
-        self._attr_device_class = meta.get("device_class")
-        self._attr_state_class = meta.get("state_class")
-        self._attr_entity_category = meta.get("entity_category")
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_entity_category = entity_category
         self._attr_has_entity_name = True
+        # Partie fixe du device_info ; seul le nom dépend des données du coordinateur
+        self._device_info_base = {**_BEEMBOX_DEVICE_BASE, "identifiers": {(DOMAIN, f"beembox_{self._box_id}")}}
+        self._summary_ref = coordinator.data.get("beemboxes_summary_by_id") or {}
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self.coordinator.async_add_listener(self._handle_coordinator_update))
+
+    @callback
+    def _handle_coordinator_update(self):
+        # Le coordinateur remplace le dict des résumés à chaque rafraîchissement
+        self._summary_ref = self.coordinator.data.get("beemboxes_summary_by_id") or {}
+
+    def _get_summary(self):
+        return self._summary_ref.get(self._box_id)
 
     @property
     def native_value(self):
         """Retourne la valeur du capteur."""
-        summary_data = self.coordinator.data.get("beemboxes_summary_by_id", {}).get(self._box_id)
+        summary_data = self._get_summary()
         if not summary_data:
             return None
 
         value = summary_data.get(self._key)
-        
-        if self._attr_device_class == "timestamp" and isinstance(value, str):
+
+        if self._is_timestamp and isinstance(value, str):
             try:
                 return datetime.fromisoformat(value.replace("Z", "+00:00"))
             except (ValueError, TypeError):
                 return None
-        
+
         return value
 
     @property
     def available(self) -> bool:
         """Retourne True si le summary est disponible pour cette box."""
-        return self.coordinator.data.get("beemboxes_summary_by_id", {}).get(self._box_id) is not None
+        return self._get_summary() is not None
 
     @property
     def device_info(self):
@@ -1332,12 +1413,7 @@ class BeemBoxSensor(SensorEntity):
         if box_info and box_info.get("name"):
             device_name = box_info["name"]
 
-        return {
-            "identifiers": {(DOMAIN, f"beembox_{self._box_id}")},
-            "name": device_name,
-            "manufacturer": "Beem Energy",
-            "model": "BeemOn / PnP",
-        }
+        return {**self._device_info_base, "name": device_name}
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     _LOGGER.info(">>> Déchargement des entités Beem (sensor) pour l'entrée: %s", entry.entry_id)
@@ -1381,6 +1457,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 class BeemEnergySwitchSensor(RestoreEntity, SensorEntity):
+    __slots__ = (
+        "_serial", "_channel", "_logical_key", "_unit", "_icon", "_friendly", "_mqtt_buffer",
+        "_device_class", "_state_class", "_buffer_keys", "_round", "_unsub_dispatcher",
+    )
+
     def __init__(
         self,
         serial,
@@ -1401,11 +1482,16 @@ class BeemEnergySwitchSensor(RestoreEntity, SensorEntity):
         self._icon = icon
         self._friendly = friendly_name
         self._mqtt_buffer = mqtt_buffer
-        self._precision = precision
         self._device_class = device_class
         self._state_class = state_class
 
         _ckey = _clean_key(self._serial, logical_key)
+        # Clés du buffer candidates, figées à la construction
+        self._buffer_keys = tuple(
+            f"ch{self._channel}_{_clean_key(self._serial, k)}"
+            for k in _es_candidate_keys_for_read(self._logical_key)
+        )
+        self._round = precision if isinstance(precision, int) else None
         self._attr_unique_id = f"beem_es_{self._serial}_ch{self._channel}_{_ckey}"
         self._attr_name = f"ES {self._serial} {friendly_name}"
         self._attr_icon = icon
@@ -1424,7 +1510,7 @@ class BeemEnergySwitchSensor(RestoreEntity, SensorEntity):
         if last_state and last_state.state not in (None, "unknown", "unavailable"):
             try:
                 self._attr_native_value = float(last_state.state)
-            except Exception:
+            except (ValueError, TypeError):
                 self._attr_native_value = last_state.state
         self._unsub_dispatcher = async_dispatcher_connect(
             self.hass, f"{SIGNAL_BEEM_ES_UPDATE}_{self._serial}", self.async_write_ha_state
@@ -1442,27 +1528,25 @@ class BeemEnergySwitchSensor(RestoreEntity, SensorEntity):
 
     @property
     def native_value(self):
-        for k in _es_candidate_keys_for_read(self._logical_key):
-            buffer_key = f"ch{self._channel}_{_clean_key(self._serial, k)}"
-            raw, _ = self._mqtt_buffer.get(buffer_key)
+        for bk in self._buffer_keys:
+            raw, _ = self._mqtt_buffer.get(bk)
             if raw is None:
                 continue
+            if self._round is None:
+                return raw
             try:
-                if isinstance(self._precision, int):
-                    return round(float(raw), self._precision)
-            except Exception:
+                return round(float(raw), self._round)
+            except (ValueError, TypeError):
                 return raw
-            return raw
         return None
 
     async def async_update(self):
         return
 
-    @property
+    @functools.cached_property
     def device_info(self):
         return {
+            **_ES_DEVICE_BASE,
             "identifiers": {(DOMAIN, f"energyswitch_{self._serial}")},
             "name": f"Beem EnergySwitch {self._serial}",
-            "manufacturer": "Beem Energy",
-            "model": "EnergySwitch",
         }
@@ -1,17 +1,24 @@
 # Copyright (c) 2025 Charles P44
 # SPDX-License-Identifier: MIT
 import logging
+import asyncio
 import os
 import csv
-import aiohttp
-from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
+from collections import defaultdict, deque
+from contextlib import aclosing
+from itertools import accumulate, islice
 from functools import partial
+from operator import itemgetter
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 
+import aiohttp
 import voluptuous as vol
 from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.helpers import config_validation as cv, device_registry as dr, entity_registry as er
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
 
 from .const import DOMAIN
 
@@ -30,292 +37,334 @@ BASE_SERVICE_SCHEMA = vol.Schema(
     extra=vol.ALLOW_EXTRA,
 )
 
+PARIS_TZ = ZoneInfo("Europe/Paris")
+EXPORT_WINDOW = timedelta(days=7)
+EXPORT_CONCURRENCY = 8
+WRITE_QUEUE_SIZE = 64  # lots (une fenêtre chacun) en attente d'écriture
+FETCH_ATTEMPTS = 4
+FETCH_BACKOFF = 0.5  # secondes, doublé à chaque nouvel essai
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+EXPORT_CSV_HEADER = ("startDate_utc", "datetime_paris", "device_id", "value_Wh")
+IMPORT_CSV_HEADER = ("statistic_id", "unit", "start", "state", "sum")
+CSV_DIR = "/config/www/beem_exports"
+_URL_TEMPLATE = (
+    ("production", "https://api-x.beem.energy/beemapp/production/energy/intraday"),
+    ("house_active", "https://api-x.beem.energy/beemapp/consumption/houses/active-energy/intraday"),
+    ("house_returned", "https://api-x.beem.energy/beemapp/consumption/houses/active-returned-energy/intraday"),
+)
+_BATTERY_URL_TEMPLATE = (
+    ("battery_charged", "https://api-x.beem.energy/beemapp/batteries/{battery_id}/energy-charged/intraday"),
+    ("battery_discharged", "https://api-x.beem.energy/beemapp/batteries/{battery_id}/energy-discharged/intraday"),
+)
+API_TO_SENSOR_MAP = {
+    "production": ("solarPower", "production"),
+    "house_returned": ("meterPower", "injection"),
+    "house_active": ("meterPower", "consumption"),
+    "battery_discharged": ("batteryPower", "discharging"),
+    "battery_charged": ("batteryPower", "charging"),
+}
+
 # --- Fonctions utilitaires ---
 def _build_api_urls(battery_id: int | None) -> dict:
-    urls = {
-        "production": "https://api-x.beem.energy/beemapp/production/energy/intraday",
-        "house_active": "https://api-x.beem.energy/beemapp/consumption/houses/active-energy/intraday",
-        "house_returned": "https://api-x.beem.energy/beemapp/consumption/houses/active-returned-energy/intraday",
-    }
+    urls = dict(_URL_TEMPLATE)
     if battery_id:
-        urls["battery_charged"] = f"https://api-x.beem.energy/beemapp/batteries/{battery_id}/energy-charged/intraday"
-        urls["battery_discharged"] = f"https://api-x.beem.energy/beemapp/batteries/{battery_id}/energy-discharged/intraday"
+        urls.update((name, tpl.format(battery_id=battery_id)) for name, tpl in _BATTERY_URL_TEMPLATE)
     return urls
 
-def _write_csv_sync(file_path: str, all_rows: list[dict], fieldnames: list[str]):
-    _LOGGER.debug("Écriture de %d lignes dans %s", len(all_rows), file_path)
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(all_rows)
+def _parse_iso(value: str) -> datetime | None:
+    """Chemin rapide en C via fromisoformat, repli sur le parseur de HA pour les formats exotiques."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return dt_util.parse_datetime(value)
 
-# --- Logique des services ---
+# Formatage des heures de Paris sans strftime (qui repasse par time.strftime à chaque appel)
+def _paris_export_str(dt: datetime) -> str:
+    """Équivaut à strftime("%Y-%m-%d %H:%M:%S") en heure de Paris."""
+    return dt.astimezone(PARIS_TZ).isoformat(" ")[:19]
 
-async def async_export_to_csv(hass: HomeAssistant, service_call: ServiceCall):
-    """Service pour exporter les données historiques en CSV standard."""
-    start_date = service_call.data["start_date"]
-    end_date = service_call.data["end_date"]
-    device_ids = service_call.data.get("device") or service_call.data.get("device_id") or []
-    if not isinstance(device_ids, list): device_ids = [device_ids]
-    if not device_ids:
-        _LOGGER.error("Aucun appareil n'a été ciblé pour l'exportation.")
-        return
+def _paris_import_str(dt: datetime) -> str:
+    """Équivaut à strftime("%d.%m.%Y %H:%M") en heure de Paris."""
+    d = dt.astimezone(PARIS_TZ)
+    return f"{d.day:02d}.{d.month:02d}.{d.year} {d.hour:02d}:{d.minute:02d}"
 
-    device_reg = dr.async_get(hass)
-    for device_id in device_ids:
-        device = device_reg.async_get(device_id)
-        if not device or not device.config_entries: continue
-        
-        entry_id = list(device.config_entries)[0]
-        _LOGGER.info("Exportation CSV pour le compte %s (appareil %s), de %s à %s", entry_id, device_id, start_date, end_date)
-        
-        entry_data = hass.data[DOMAIN][entry_id]
-        coordinator = entry_data.get("coordinator")
-        if not coordinator or not coordinator.data.get("battery"):
-            _LOGGER.warning("Coordinateur non prêt ou pas de batterie pour le compte %s.", entry_id)
+def _build_windows(start_dt: datetime, end_dt: datetime) -> list[tuple[datetime, datetime]]:
+    """Découpe [start_dt, end_dt[ en fenêtres successives de EXPORT_WINDOW."""
+    windows, cur_from = [], start_dt
+    while cur_from < end_dt:
+        cur_to = min(end_dt, cur_from + EXPORT_WINDOW)
+        windows.append((cur_from, cur_to))
+        cur_from = cur_to
+    return windows
 
-        token_rest = coordinator.token_rest
-        battery_id = coordinator.data.get("battery", {}).get("id")
-        
-        API_URLS = _build_api_urls(battery_id)
-        CSV_DIR = "/config/www/beem_exports"
-        start_dt = dt_util.as_local(datetime.combine(start_date, datetime.min.time()))
-        end_dt = dt_util.as_local(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
-
-        async with aiohttp.ClientSession() as session:
-            headers = {"Authorization": f"Bearer {token_rest}", "Accept": "application/json"}
-            for api_name, api_url in API_URLS.items():
-                _LOGGER.info(f"📡 Traitement de : {api_name} pour l'appareil {device_id}")
-                cur_from, all_rows = start_dt, []
-                while cur_from < end_dt:
-                    cur_to = min(end_dt, cur_from + timedelta(days=7))
-                    params = {"from": cur_from.isoformat(), "to": cur_to.isoformat(), "scale": "PT60M"}
-                    try:
-                        async with session.get(api_url, headers=headers, params=params, timeout=30) as resp:
-                            resp.raise_for_status()
-                            data = await resp.json()
-                        devices = data.get("devices") or data.get("houses") or ([data] if "batteryId" in data else [])
-                        for device_data in devices:
-                            dev_id = device_data.get("deviceId") or device_data.get("houseId") or device_data.get("batteryId", "N/A")
-                            for measure in device_data.get("measures", []):
-                                start_iso, val = measure.get("startDate"), measure.get("value", 0)
-                                if start_iso and val is not None:
-                                    dt_utc = dt_util.parse_datetime(start_iso)
-                                    dt_paris = dt_utc.astimezone(ZoneInfo("Europe/Paris"))
-                                    all_rows.append({"startDate_utc": dt_utc.isoformat(), "datetime_paris": dt_paris.strftime("%Y-%m-%d %H:%M:%S"), "device_id": str(dev_id), "value_Wh": float(val)})
-                    except Exception as e:
-                        _LOGGER.error(f"   → Erreur lors de la récupération du chunk pour {api_name}: {e}")
-                    cur_from = cur_to
-                
-                if all_rows:
-                    entry_title = hass.config_entries.async_get_entry(entry_id).title.replace(" ", "_").lower()
-                    filename = f"{api_name}_export_{entry_title}_{start_date}_to_{end_date}.csv"
-                    file_path = os.path.join(CSV_DIR, filename)
-                    fieldnames = ["startDate_utc", "datetime_paris", "device_id", "value_Wh"]
-                    await hass.async_add_executor_job(_write_csv_sync, file_path, sorted(all_rows, key=lambda x: x["datetime_paris"]), fieldnames)
-                    _LOGGER.info(f"✅ Fichier exporté : /local/beem_exports/{filename}")
-                else:
-                    _LOGGER.warning(f"Aucune donnée à exporter pour {api_name}")
-
-    await hass.services.async_call("persistent_notification", "create", {"title": "Beem Energy Export", "message": "Exportation CSV terminée."})
-
-async def async_export_for_import(hass: HomeAssistant, service_call: ServiceCall):
-    """Service pour exporter les données dans un format cumulatif générique."""
-    start_date, end_date = service_call.data["start_date"], service_call.data["end_date"]
-    device_ids = service_call.data.get("device") or service_call.data.get("device_id") or []
-    if not isinstance(device_ids, list): device_ids = [device_ids]
-    if not device_ids:
-        _LOGGER.error("Aucun appareil n'a été ciblé.")
-        return
+def _retry_after(value: str | None) -> float:
+    """Délai demandé par l'en-tête Retry-After (forme en secondes uniquement), plafonné à une minute."""
+    try:
+        return min(max(float(value), 0.0), 60.0)
+    except (TypeError, ValueError):
+        return 0.0
 
-    device_reg = dr.async_get(hass)
-    for device_id in device_ids:
-        device = device_reg.async_get(device_id)
-        if not device or not device.config_entries: continue
-        
-        entry_id = list(device.config_entries)[0]
-        _LOGGER.info("Export (format import) pour le compte %s de %s à %s", entry_id, start_date, end_date)
-        
-        entry_data = hass.data[DOMAIN][entry_id]
-        coordinator = entry_data.get("coordinator")
-        if not coordinator or not coordinator.data: continue
+async def _fetch_window(session, url: str, headers: dict, cur_from: datetime, cur_to: datetime, sem: asyncio.Semaphore) -> dict:
+    params = {"from": cur_from.isoformat(), "to": cur_to.isoformat(), "scale": "PT60M"}
+    async with sem:
+        for attempt in range(FETCH_ATTEMPTS):
+            delay = FETCH_BACKOFF * 2 ** attempt
+            last_attempt = attempt == FETCH_ATTEMPTS - 1
+            try:
+                async with session.get(url, headers=headers, params=params, timeout=30) as resp:
+                    status = resp.status
+                    if status == 200:
+                        return await resp.json(loads=json_loads)
+                    if status not in RETRY_STATUSES or last_attempt:
+                        # Chemin rare : construit l'erreur détaillée (remontée comme "Erreur de chunk")
+                        resp.raise_for_status()
+                        raise aiohttp.ClientResponseError(resp.request_info, resp.history, status=status, message=resp.reason or "")
+                    delay = max(delay, _retry_after(resp.headers.get("Retry-After")))
+                    _LOGGER.debug("HTTP %s sur %s, nouvel essai dans %.1fs", status, url, delay)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                if last_attempt: raise
+                _LOGGER.debug("Erreur réseau sur %s (%s), nouvel essai dans %.1fs", url, e, delay)
+            # Le sémaphore reste pris pendant l'attente : on ralentit l'ensemble face au rate limit
+            await asyncio.sleep(delay)
 
-        token_rest = coordinator.token_rest
-        battery_id = coordinator.data.get("battery", {}).get("id")
-        
-        API_URLS = _build_api_urls(battery_id)
-        CSV_DIR = "/config/www/beem_exports"
-        start_dt = dt_util.as_local(datetime.combine(start_date, datetime.min.time()))
-        end_dt = dt_util.as_local(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
-
-        async with aiohttp.ClientSession() as session:
-            headers = {"Authorization": f"Bearer {token_rest}", "Accept": "application/json"}
-            for api_name, api_url in API_URLS.items():
-                _LOGGER.info(f"Traitement (format import) de : {api_name} pour l'appareil {device_id}")
-                cur_from, raw_measures = start_dt, []
-                while cur_from < end_dt:
-                    cur_to = min(end_dt, cur_from + timedelta(days=7))
-                    params = {"from": cur_from.isoformat(), "to": cur_to.isoformat(), "scale": "PT60M"}
-                    try:
-                        async with session.get(api_url, headers=headers, params=params, timeout=30) as resp:
-                            resp.raise_for_status(); data = await resp.json()
-                        devices = data.get("devices") or data.get("houses") or ([data] if "batteryId" in data else [])
-                        for device_data in devices:
-                            for measure in device_data.get("measures", []):
-                                start_iso, val = measure.get("startDate"), measure.get("value", 0)
-                                if start_iso and val is not None:
-                                    raw_measures.append({"start": dt_util.parse_datetime(start_iso), "value": float(val)})
-                    except Exception as e: _LOGGER.error(f"Erreur de chunk pour {api_name}: {e}")
-                    cur_from = cur_to
-                if not raw_measures: continue
-                
-                if api_name == "production":
-                    hourly_agg = {m["start"].strftime("%Y-%m-%d %H:00:00"): 0.0 for m in raw_measures}
-                    for m in raw_measures: hourly_agg[m["start"].strftime("%Y-%m-%d %H:00:00")] += m["value"]
-                    processed_measures = [{"start": datetime.fromisoformat(k).replace(tzinfo=timezone.utc), "value": v} for k, v in hourly_agg.items()]
-                else:
-                    processed_measures = raw_measures
-                
-                processed_measures.sort(key=lambda x: x["start"])
-                all_rows_for_import, cumulative_sum_kwh = [], 0.0
-                entry_title = hass.config_entries.async_get_entry(entry_id).title.replace(" ", "_").lower()
-                statistic_id = f"beem_energy:{api_name}_{entry_title}"
+def _flatten_window(data: dict) -> list[tuple[datetime, str, float]]:
+    """Aplatit la réponse d'une fenêtre en tuples (start, device_id, value_Wh)."""
+    measures = []
+    devices = data.get("devices") or data.get("houses") or ([data] if "batteryId" in data else [])
+    for device_data in devices:
+        dev_id = str(device_data.get("deviceId") or device_data.get("houseId") or device_data.get("batteryId", "N/A"))
+        for measure in device_data.get("measures", []):
+            start_iso, val = measure.get("startDate"), measure.get("value", 0)
+            if not start_iso or val is None:
+                continue
+            # Date illisible : mesure ignorée plutôt que de casser le tri de la fenêtre
+            start = _parse_iso(start_iso)
+            if start is not None:
+                measures.append((start, dev_id, float(val)))
+    return measures
 
-                for measure in processed_measures:
-                    cumulative_sum_kwh += measure["value"] / 1000.0
-                    dt_paris = measure["start"].astimezone(ZoneInfo("Europe/Paris"))
-                    all_rows_for_import.append({"statistic_id": statistic_id, "unit": "kWh", "start": dt_paris.strftime("%d.%m.%Y %H:%M"), "state": "", "sum": round(cumulative_sum_kwh, 6)})
+async def _iter_window_measures(session, url: str, headers: dict, windows, sem: asyncio.Semaphore, api_name: str):
+    """Restitue les mesures fenêtre par fenêtre, dans l'ordre chronologique.
 
-                filename = f"{api_name}_import_format_{entry_title}_{start_date}_to_{end_date}.csv"
-                file_path = os.path.join(CSV_DIR, filename)
-                await hass.async_add_executor_job(_write_csv_sync, file_path, all_rows_for_import, ["statistic_id", "unit", "start", "state", "sum"])
-                _LOGGER.info(f"✅ Fichier (format import) exporté : /local/beem_exports/{filename}")
+    Au plus EXPORT_CONCURRENCY fenêtres sont en vol d'avance sur le consommateur : la
+    contre-pression de l'écrivain freine donc aussi les requêtes. Chaque tâche est retirée
+    de la file avant d'être lue, pour que sa réponse JSON soit libérée dès l'aplatissement.
+    """
+    remaining = iter(windows)
+    pending = deque()
+
+    def _fill():
+        for f, t in islice(remaining, EXPORT_CONCURRENCY - len(pending)):
+            pending.append(asyncio.create_task(_fetch_window(session, url, headers, f, t, sem)))
+
+    _fill()
+    try:
+        while pending:
+            task = pending.popleft()
+            _fill()
+            try:
+                measures = _flatten_window(await task)
+            except Exception as e:
+                _LOGGER.error(f"Erreur de chunk pour {api_name}: {e}")
+                continue
+            finally:
+                del task
+            yield measures
+    finally:
+        for task in pending: task.cancel()
+
+def _open_csv_sync(file_path: str, header: tuple[str, ...]):
+    f = open(file_path, "w", newline="", encoding="utf-8", buffering=1 << 20)
+    writer = csv.writer(f)
+    writer.writerow(header)
+    return f, writer
+
+async def _csv_writer_consumer(hass: HomeAssistant, queue: asyncio.Queue, file_path: str, header: tuple[str, ...]) -> int:
+    """Unique écrivain du fichier : consomme les lots de lignes jusqu'à la sentinelle None.
+
+    Le fichier n'est créé qu'au premier lot et toutes les opérations fichier passent par
+    l'executor. En cas d'erreur d'écriture, la file continue d'être vidée pour ne pas bloquer
+    le producteur, puis l'erreur est relevée. En cas d'annulation, le job executor en cours
+    est attendu avant la fermeture du fichier.
+    """
+    f = writer = None
+    open_job = write_job = None
+    written, error = 0, None
+    try:
+        while (rows := await queue.get()) is not None:
+            if error: continue
+            try:
+                if f is None:
+                    open_job = hass.async_add_executor_job(_open_csv_sync, file_path, header)
+                    f, writer = await asyncio.shield(open_job)
+                write_job = hass.async_add_executor_job(writer.writerows, rows)
+                await asyncio.shield(write_job)
+                written += len(rows)
+            except Exception as e:
+                error = e
+    finally:
+        in_flight = [job for job in (open_job, write_job) if job is not None and not job.done()]
+        if in_flight:
+            await asyncio.wait(in_flight)
+        if f is None and open_job is not None and not open_job.cancelled() and open_job.exception() is None:
+            f = open_job.result()[0]
+        if f is not None:
+            await hass.async_add_executor_job(f.close)
+    if error: raise error
+    _LOGGER.debug("Écriture de %d lignes dans %s", written, file_path)
+    return written
+
+# --- Logique des services ---
+
+EXPORT_RAW = "raw"
+EXPORT_IMPORT = "import"
+EXPORT_HA = "ha"
 
-    await hass.services.async_call("persistent_notification", "create", {"title": "Beem Energy Export", "message": "Exportation (format import) terminée."})
+# Libellé utilisé dans les logs et message de la notification de fin, par mode
+_EXPORT_LABELS = {
+    EXPORT_RAW: ("CSV", "Exportation CSV terminée."),
+    EXPORT_IMPORT: ("format import", "Exportation (format import) terminée."),
+    EXPORT_HA: ("format HA", "Exportation (format HA) terminée."),
+}
 
-async def async_export_for_ha_import(hass: HomeAssistant, service_call: ServiceCall):
-    """Exporte les données en utilisant les entity_id des capteurs existants."""
+def _window_series(measures: list[tuple[datetime, str, float]], hourly: bool) -> list[tuple[datetime, float]]:
+    """Trie les mesures d'une fenêtre, agrégées par heure si demandé, en couples (start, value_Wh).
+
+    Les fenêtres commencent à minuit local : une heure ne chevauche jamais deux fenêtres.
+    """
+    if hourly:
+        hourly_agg = defaultdict(float)
+        for start, _, value in measures: hourly_agg[start.replace(minute=0, second=0, microsecond=0)] += value
+        return sorted(hourly_agg.items(), key=itemgetter(0))
+    return sorted(((start, value) for start, _, value in measures), key=itemgetter(0))
+
+async def _run_export(hass: HomeAssistant, service_call: ServiceCall, mode: str):
+    """Logique commune aux trois services d'export ; `mode` ne change que la forme des lignes et le nommage."""
+    label, done_message = _EXPORT_LABELS[mode]
     start_date, end_date = service_call.data["start_date"], service_call.data["end_date"]
     device_ids = service_call.data.get("device") or service_call.data.get("device_id") or []
     if not isinstance(device_ids, list): device_ids = [device_ids]
     if not device_ids:
-        _LOGGER.error("Aucun appareil n'a été ciblé.")
+        _LOGGER.error("Aucun appareil n'a été ciblé pour l'exportation.")
         return
 
     device_reg = dr.async_get(hass)
     ent_reg = er.async_get(hass)
+    start_dt = dt_util.as_local(datetime.combine(start_date, datetime.min.time()))
+    end_dt = dt_util.as_local(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    windows = _build_windows(start_dt, end_dt)
+    await hass.async_add_executor_job(partial(os.makedirs, CSV_DIR, exist_ok=True))
 
     for device_id in device_ids:
         device = device_reg.async_get(device_id)
         if not device or not device.config_entries: continue
-        
+
         entry_id = list(device.config_entries)[0]
-        _LOGGER.info("Export (format HA) pour le compte %s de %s à %s", entry_id, start_date, end_date)
-        
+        _LOGGER.info("Export (%s) pour le compte %s (appareil %s), de %s à %s", label, entry_id, device_id, start_date, end_date)
+
         entry_data = hass.data[DOMAIN][entry_id]
         coordinator = entry_data.get("coordinator")
-        if not coordinator or not coordinator.data: continue
+        if not coordinator or not coordinator.data:
+            _LOGGER.warning("Coordinateur non prêt pour le compte %s.", entry_id)
+            continue
 
-        token_rest = coordinator.token_rest
         battery_id = coordinator.data.get("battery", {}).get("id")
         main_serial_lower = coordinator.data.get("main_battery_serial", "").lower()
-        if not main_serial_lower:
+        if mode == EXPORT_HA and not main_serial_lower:
             _LOGGER.error("Impossible de trouver le numéro de série principal pour le compte %s.", entry_id)
             continue
 
-        API_TO_SENSOR_MAP = {
-            "production": ("solarPower", "production"),
-            "house_returned": ("meterPower", "injection"),
-            "house_active": ("meterPower", "consumption"),
-            "battery_discharged": ("batteryPower", "discharging"),
-            "battery_charged": ("batteryPower", "charging"),
-        }
-        API_URLS = _build_api_urls(battery_id)
-        CSV_DIR = "/config/www/beem_exports"
-        start_dt = dt_util.as_local(datetime.combine(start_date, datetime.min.time()))
-        end_dt = dt_util.as_local(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
-        
-        async with aiohttp.ClientSession() as session:
-            headers = {"Authorization": f"Bearer {token_rest}", "Accept": "application/json"}
-            for api_name, (source_key, mode) in API_TO_SENSOR_MAP.items():
-                if api_name.startswith("battery_") and not battery_id: continue
-                
-                ckey = f"{source_key.lower()}_{mode}_kwh"
-                unique_id = f"beem_{main_serial_lower}_{ckey}"
-                entity_id = ent_reg.async_get_entity_id("sensor", DOMAIN, unique_id)
-                if not entity_id:
+        api_urls = _build_api_urls(battery_id)
+        session = async_get_clientsession(hass)
+        sem = asyncio.Semaphore(EXPORT_CONCURRENCY)
+        headers = {"Authorization": f"Bearer {coordinator.token_rest}", "Accept": "application/json"}
+        entry_title = hass.config_entries.async_get_entry(entry_id).title.replace(" ", "_").lower()
+
+        async def _process_api(api_name: str, api_url: str):
+            if mode == EXPORT_HA:
+                source_key, direction = API_TO_SENSOR_MAP[api_name]
+                unique_id = f"beem_{main_serial_lower}_{source_key.lower()}_{direction}_kwh"
+                statistic_id = ent_reg.async_get_entity_id("sensor", DOMAIN, unique_id)
+                if not statistic_id:
                     _LOGGER.warning(f"Capteur avec unique_id '{unique_id}' non trouvé, export ignoré.")
-                    continue
-                
-                statistic_id = entity_id
-                _LOGGER.info(f"Traitement (format HA) de : {api_name} -> {statistic_id}")
-                
-                api_url = API_URLS[api_name]
-                raw_measures, cur_from = [], start_dt
-                while cur_from < end_dt:
-                    cur_to = min(end_dt, cur_from + timedelta(days=7))
-                    params = {"from": cur_from.isoformat(), "to": cur_to.isoformat(), "scale": "PT60M"}
-                    try:
-                        async with session.get(api_url, headers=headers, params=params, timeout=30) as resp:
-                            resp.raise_for_status(); data = await resp.json()
-                        devices = data.get("devices") or data.get("houses") or ([data] if "batteryId" in data else [])
-                        for device_data in devices:
-                            for measure in device_data.get("measures", []):
-                                start_iso, val = measure.get("startDate"), measure.get("value", 0)
-                                if start_iso and val is not None:
-                                    raw_measures.append({"start": dt_util.parse_datetime(start_iso), "value": float(val)})
-                    except Exception as e: _LOGGER.error(f"Erreur de chunk pour {api_name}: {e}")
-                    cur_from = cur_to
-                if not raw_measures: continue
-                
-                if api_name == "production":
-                    hourly_agg = {m["start"].strftime("%Y-%m-%d %H:00:00"): 0.0 for m in raw_measures}
-                    for m in raw_measures: hourly_agg[m["start"].strftime("%Y-%m-%d %H:00:00")] += m["value"]
-                    processed_measures = [{"start": datetime.fromisoformat(k).replace(tzinfo=timezone.utc), "value": v} for k, v in hourly_agg.items()]
-                else:
-                    processed_measures = raw_measures
-                
-                processed_measures.sort(key=lambda x: x["start"])
-                all_rows, cumulative_sum_kwh = [], 0.0
-                for measure in processed_measures:
-                    cumulative_sum_kwh += measure["value"] / 1000.0
-                    dt_paris = measure["start"].astimezone(ZoneInfo("Europe/Paris"))
-                    all_rows.append({"statistic_id": statistic_id, "unit": "kWh", "start": dt_paris.strftime("%d.%m.%Y %H:%M"), "state": "", "sum": round(cumulative_sum_kwh, 6)})
-                
+                    return
                 filename = f"{statistic_id.replace('sensor.','')}_import_ha_{start_date}_to_{end_date}.csv"
-                file_path = os.path.join(CSV_DIR, filename)
-                await hass.async_add_executor_job(_write_csv_sync, file_path, all_rows, ["statistic_id", "unit", "start", "state", "sum"])
-                _LOGGER.info(f"✅ Fichier (format HA) exporté : /local/beem_exports/{filename}")
+            elif mode == EXPORT_IMPORT:
+                statistic_id = f"beem_energy:{api_name}_{entry_title}"
+                filename = f"{api_name}_import_format_{entry_title}_{start_date}_to_{end_date}.csv"
+            else:
+                filename = f"{api_name}_export_{entry_title}_{start_date}_to_{end_date}.csv"
+
+            _LOGGER.info(f"📡 Traitement ({label}) de : {api_name} pour l'appareil {device_id}")
+            file_path = os.path.join(CSV_DIR, filename)
+            header = EXPORT_CSV_HEADER if mode == EXPORT_RAW else IMPORT_CSV_HEADER
+            queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+            writer_task = asyncio.create_task(_csv_writer_consumer(hass, queue, file_path, header))
+            cumulative_sum_wh = 0.0
+            try:
+                async with aclosing(_iter_window_measures(session, api_url, headers, windows, sem, api_name)) as batches:
+                    async for measures in batches:
+                        if not measures: continue
+                        if mode == EXPORT_RAW:
+                            # Fenêtres disjointes et ordonnées : trier chaque fenêtre suffit, sans fusion globale.
+                            # Chaque appareil arrive déjà trié : le timsort fusionne ces séries en C, plus vite qu'un heapq.merge.
+                            # Tri sur l'instant (datetime) et non sur la chaîne locale, ambiguë au passage à l'heure d'hiver
+                            measures.sort(key=itemgetter(0))
+                            rows = [
+                                (dt_utc.isoformat(), _paris_export_str(dt_utc), dev_id, val)
+                                for dt_utc, dev_id, val in measures
+                            ]
+                        else:
+                            series = _window_series(measures, hourly=api_name == "production")
+                            totals = list(accumulate(map(itemgetter(1), series), initial=cumulative_sum_wh))
+                            cumulative_sum_wh = totals[-1]
+                            rows = [
+                                (statistic_id, "kWh", _paris_import_str(start), "", round(total * 1e-3, 6))
+                                for (start, _), total in zip(series, totals[1:])
+                            ]
+                        await queue.put(rows)
+                await queue.put(None)
+                written = await writer_task
+            except BaseException:
+                # L'écrivain termine son job executor et ferme le fichier avant qu'on propage
+                writer_task.cancel()
+                await asyncio.wait((writer_task,))
+                raise
+
+            if not written:
+                _LOGGER.warning(f"Aucune donnée à exporter pour {api_name}")
+                return
+            _LOGGER.info(f"✅ Fichier ({label}) exporté : /local/beem_exports/{filename}")
 
-    await hass.services.async_call("persistent_notification", "create", {"title": "Beem Energy Export", "message": "Exportation (format HA) terminée."})
+        # Un endpoint en échec n'interrompt ni les autres ni la notification de fin
+        results = await asyncio.gather(*(_process_api(n, u) for n, u in api_urls.items()), return_exceptions=True)
+        for api_name, result in zip(api_urls, results):
+            if isinstance(result, Exception):
+                _LOGGER.error("Échec de l'export de %s pour l'appareil %s : %s", api_name, device_id, result)
+            elif isinstance(result, BaseException):
+                raise result
+
+    await hass.services.async_call("persistent_notification", "create", {"title": "Beem Energy Export", "message": done_message})
+
+# Nom de service -> mode d'export
+MODE_MAP = {
+    SERVICE_EXPORT_CSV: EXPORT_RAW,
+    SERVICE_EXPORT_FOR_IMPORT: EXPORT_IMPORT,
+    SERVICE_EXPORT_FOR_HA_IMPORT: EXPORT_HA,
+}
 
 
 # --- Fonctions d'enregistrement et de déchargement ---
 
 def async_register_services(hass: HomeAssistant):
     """Enregistre tous les services de l'intégration."""
-    hass.services.async_register(
-        DOMAIN, 
-        SERVICE_EXPORT_CSV, 
-        partial(async_export_to_csv, hass), 
-        schema=BASE_SERVICE_SCHEMA
-    )
-    hass.services.async_register(
-        DOMAIN, 
-        SERVICE_EXPORT_FOR_IMPORT, 
-        partial(async_export_for_import, hass), 
-        schema=BASE_SERVICE_SCHEMA
-    )
-    hass.services.async_register(
-        DOMAIN, 
-        SERVICE_EXPORT_FOR_HA_IMPORT, 
-        partial(async_export_for_ha_import, hass), 
-        schema=BASE_SERVICE_SCHEMA
-    )
+    async def _dispatch(service_call: ServiceCall):
+        await _run_export(hass, service_call, MODE_MAP[service_call.service])
+
+    for service in MODE_MAP:
+        hass.services.async_register(DOMAIN, service, _dispatch, schema=BASE_SERVICE_SCHEMA)
 
 def async_unload_services(hass: HomeAssistant):
     """Supprime les services lors du déchargement de l'intégration."""
-    hass.services.async_remove(DOMAIN, SERVICE_EXPORT_CSV)
-    hass.services.async_remove(DOMAIN, SERVICE_EXPORT_FOR_IMPORT)
-    hass.services.async_remove(DOMAIN, SERVICE_EXPORT_FOR_HA_IMPORT)
+    for service in MODE_MAP:
+        hass.services.async_remove(DOMAIN, service)